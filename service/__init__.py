@@ -23,6 +23,7 @@ import sys
 from flask import Flask
 from service import config
 from service.common import log_handlers
+from service.common.json_provider import OrjsonProvider
 
 
 ############################################################
@@ -33,6 +34,7 @@ def create_app():
     # Create Flask application
     app = Flask(__name__)
     app.config.from_object(config)
+    app.json = OrjsonProvider(app)
 
     # Initialize Plugins
     # pylint: disable=import-outside-toplevel
@@ -0,0 +1,59 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+JSON Provider
+
+This module replaces Flask's default stdlib json provider with one
+backed by orjson, which encodes and decodes in C
+"""
+from decimal import Decimal
+import orjson
+from flask.json.provider import JSONProvider
+
+# Allow integer keys so id-keyed maps can be returned as-is
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def default(obj):
+    """Encodes the types orjson does not support natively"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj) -> bytes:
+    """Serializes obj straight to UTF-8 JSON bytes"""
+    return orjson.dumps(obj, default=default, option=OPTIONS)
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider that uses orjson for jsonify and get_json"""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serializes obj to a JSON string"""
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserializes a JSON string or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Builds a JSON response without the intermediate str"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
@@ -13,7 +13,15 @@ DATABASE_URI = os.getenv(
 # Configure SQLAlchemy
 SQLALCHEMY_DATABASE_URI = DATABASE_URI
 SQLALCHEMY_TRACK_MODIFICATIONS = False
-# SQLALCHEMY_POOL_SIZE = 2
+# Skip the extra round-trip that pre-pinging would add to every checkout
+SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": False}
+# Size the connection pool for concurrent requests. SQLite does not use a
+# QueuePool for every URI, and its pools reject these options
+if not DATABASE_URI.startswith("sqlite"):
+    SQLALCHEMY_ENGINE_OPTIONS.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "40")),
+    )
 
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "sup3r-s3cr3t")
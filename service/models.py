@@ -4,17 +4,27 @@ Models for Products
 All of the models are stored in this module
 """
 
+import hashlib
 import logging
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Numeric
+from sqlalchemy import Numeric, insert
 from sqlalchemy import Column, String, Integer
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
 logger = logging.getLogger("flask.app")
 
 # Create the SQLAlchemy object to be initialized later in init_db()
 db = SQLAlchemy()
 
+# Names of the columns that Products are serialized with
+FIELDS = ("id", "name", "description", "price")
+
+# Number of rows fetched from the database at a time when streaming
+ROWS_PER_PAGE = 500
+
+# Values that fit in an Integer column, like the id
+INTEGER_RANGE = range(-(2**31), 2**31)
+
 
 class DataValidationError(Exception):
     """Used for an data validation errors when deserializing"""
@@ -29,9 +39,12 @@ class Products(db.Model):
     # Table Schema
     ##################################################
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(63))
+    name = db.Column(db.String(63), index=True)
     description = db.Column(db.String(256))
-    price = db.Column(Numeric(10, 2))  # 10 digits total, with 2 decimal places
+    # 10 digits total, with 2 decimal places. Keep asdecimal=True: psycopg
+    # already returns NUMERIC as Decimal so no result processor runs, while
+    # asdecimal=False would add a float conversion per row and lose cents
+    price = db.Column(Numeric(10, 2))
 
     # Todo: Place the rest of your schema here...
 
@@ -44,6 +57,9 @@ class Products(db.Model):
         """
         logger.info("Creating %s", self.name)
         self.id = None  # pylint: disable=invalid-name
+        # The flush goes through the unit of work on purpose: SQLAlchemy
+        # caches the compiled INSERT per engine already, and the instance
+        # has to stay in the session so update() and delete() can use it
         try:
             db.session.add(self)
             db.session.commit()
@@ -52,6 +68,38 @@ class Products(db.Model):
             logger.error("Error creating record: %s", self)
             raise DataValidationError(e) from e
 
+    @classmethod
+    def bulk_create(cls, items):
+        """
+        Creates many Products with a single INSERT and one commit
+
+        Args:
+            items (list): dictionaries containing the resource data
+
+        Returns:
+            list: the serialized Products in the same order as items
+        """
+        logger.info("Creating %d Products in bulk", len(items))
+        rows = []
+        for item in items:
+            products = cls().deserialize(item)
+            rows.append(
+                {
+                    "name": products.name,
+                    "description": products.description,
+                    "price": products.price,
+                }
+            )
+        statement = insert(cls).returning(cls.id, sort_by_parameter_order=True)
+        try:
+            ids = db.session.scalars(statement, rows).all()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error creating %d records in bulk", len(rows))
+            raise DataValidationError(e) from e
+        return [{"id": new_id, **row} for new_id, row in zip(ids, rows)]
+
     def update(self):
         """
         Updates a Products to the database
@@ -81,11 +129,14 @@ class Products(db.Model):
             "id": self.id,
             "name": self.name,
             "description": self.description,
-            "price": str(
-                self.price
-            ),  # Convert Decimal to string for JSON serialization
+            "price": self.price,  # the JSON provider encodes Decimal as a string
         }
 
+    def etag(self):
+        """Returns a hash of the fields that changes whenever the Products does"""
+        fields = f"{self.id}\x1f{self.name}\x1f{self.description}\x1f{self.price}"
+        return hashlib.sha1(fields.encode(), usedforsecurity=False).hexdigest()
+
     def deserialize(self, data):
         """
         Deserializes a Products from a dictionary
@@ -96,7 +147,7 @@ class Products(db.Model):
         try:
             self.name = data["name"]
             self.description = data["description"]
-            self.price = Decimal(data["price"])
+            self.price = self.parse_price(data["price"])
         except AttributeError as error:
             raise DataValidationError("Invalid attribute: " + error.args[0]) from error
         except KeyError as error:
@@ -108,8 +159,59 @@ class Products(db.Model):
                 "Invalid Products: body of request contained bad or no data "
                 + str(error)
             ) from error
+        except InvalidOperation as error:
+            raise DataValidationError(
+                "Invalid Products: price is not a number"
+            ) from error
+        self.validate()
         return self
 
+    def validate(self):
+        """
+        Checks that the fields fit the table schema
+
+        This catches bad data before it is sent to the database, so a
+        successful deserialize() will not fail again in commit()
+        """
+        columns = self.__table__.c
+        for field in ("name", "description"):
+            value = getattr(self, field)
+            length = columns[field].type.length
+            if isinstance(value, str) and len(value) > length:
+                raise DataValidationError(
+                    f"Invalid Products: {field} is longer than {length} characters"
+                )
+        if self.price is not None:
+            precision = columns.price.type.precision
+            scale = columns.price.type.scale
+            if (
+                not self.price.is_finite()
+                or abs(self.price) >= Decimal(10) ** (precision - scale)
+                or self.price != self.price.quantize(Decimal(1).scaleb(-scale))
+            ):
+                raise DataValidationError(
+                    f"Invalid Products: price must have at most {precision - scale}"
+                    f" digits and {scale} decimal places"
+                )
+
+    @staticmethod
+    def parse_price(price):
+        """Converts a JSON price into a Decimal
+
+        Decimals, ints and strings go straight to Decimal, and floats are
+        converted through their shortest repr so 9.99 stays 9.99
+
+        Args:
+            price (str, int, float or Decimal): the price to convert
+        """
+        if isinstance(price, (Decimal, str)) or (
+            isinstance(price, int) and not isinstance(price, bool)
+        ):
+            return Decimal(price)
+        if isinstance(price, float):
+            return Decimal(repr(price))
+        raise TypeError(f"price must be a number, not {type(price).__name__}")
+
     ##################################################
     # CLASS METHODS
     ##################################################
@@ -124,7 +226,7 @@ class Products(db.Model):
     def find(cls, by_id):
         """Finds a Products by it's ID"""
         logger.info("Processing lookup for id %s ...", by_id)
-        return cls.query.session.get(cls, by_id)
+        return db.session.get(cls, by_id)
 
     @classmethod
     def find_by_name(cls, name):
@@ -135,3 +237,91 @@ class Products(db.Model):
         """
         logger.info("Processing name query for %s ...", name)
         return cls.query.filter(cls.name == name).all()
+
+    ##################################################
+    # ROW QUERIES
+    # These return serialized dictionaries built straight from the
+    # selected columns so that no model instances are hydrated
+    ##################################################
+
+    @classmethod
+    def select_rows(cls, fields=FIELDS):
+        """Returns a select of the given serialized columns of Products
+
+        Args:
+            fields (tuple): the names of the columns to select
+        """
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown or not fields:
+            raise DataValidationError(
+                "Invalid Products fields: " + ",".join(unknown or ["(none)"])
+            )
+        return db.select(*[getattr(cls, field) for field in fields])
+
+    @staticmethod
+    def serialize_row(row):
+        """Serializes a row from select_rows() into a dictionary"""
+        return row._asdict()
+
+    @classmethod
+    def serialize_rows(cls, statement):
+        """Executes a row select and serializes each row into a dictionary
+
+        Args:
+            statement (Select): a select built from select_rows()
+        """
+        return [cls.serialize_row(row) for row in db.session.execute(statement)]
+
+    @classmethod
+    def serialized_pages(cls, statement, size=ROWS_PER_PAGE):
+        """Executes a row select and yields the rows a page at a time
+
+        The rows are streamed from the database so only one page of
+        results is held in memory at once
+
+        Args:
+            statement (Select): a select built from select_rows()
+            size (int): the number of rows in each page
+        """
+        result = db.session.execute(statement.execution_options(yield_per=size))
+        for rows in result.partitions():
+            yield [cls.serialize_row(row) for row in rows]
+
+    @classmethod
+    def find_many_serialized(cls, ids):
+        """Returns the Products with the given ids as serialized dictionaries
+
+        All of the ids are looked up with a single IN query
+
+        Args:
+            ids (list): the ids of the Products you want to find
+        """
+        logger.info("Processing batch lookup for %d ids ...", len(ids))
+        return cls.serialize_rows(cls.select_rows().where(cls.id.in_(ids)))
+
+    @classmethod
+    def select_page(cls, cursor=None, limit=None, fields=FIELDS):
+        """Returns a row select of Products ordered by id
+
+        Args:
+            cursor (int): only return Products with an id greater than this
+            limit (int): the maximum number of Products to return
+            fields (tuple): the names of the columns to select
+        """
+        logger.info("Processing page query after %s limit %s ...", cursor, limit)
+        statement = cls.select_rows(fields).order_by(cls.id)
+        if cursor is not None:
+            statement = statement.where(cls.id > cursor)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
+
+    @classmethod
+    def find_by_name_serialized(cls, name):
+        """Returns all Products with the given name as serialized dictionaries
+
+        Args:
+            name (string): the name of the Products you want to match
+        """
+        logger.info("Processing name rows query for %s ...", name)
+        return cls.serialize_rows(cls.select_rows().where(cls.name == name))
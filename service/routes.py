@@ -21,34 +21,46 @@ This service implements a REST API that allows you to Create, Read, Update
 and Delete Products
 """
 
-from flask import jsonify, request, url_for, abort
+import functools
+from flask import jsonify, request, url_for, abort, Response, stream_with_context
 from flask import current_app as app  # Import Flask application
-from service.models import Products
+from service.models import Products, FIELDS, INTEGER_RANGE
 from service.common import status  # HTTP Status Codes
+from service.common.json_provider import dumps_bytes
+
+JSON_CONTENT_TYPE = "application/json"
+
+# Most ids that one batch lookup may ask for, well under the driver's
+# limit on the number of parameters in a single query
+MAX_BATCH_IDS = 1000
 
 
 ######################################################################
 # GET INDEX
 ######################################################################
+# The service information never changes, so it is encoded only once
+SERVICE_INFO = {
+    "service_name": "Product API Service",
+    "version": "1.0.0",
+    "endpoints": {
+        "POST /products": "Create a new product",
+        "POST /products/bulk": "Create many new products",
+        "GET /products/<id>": "Retrieve a product by ID",
+        "POST /products/batch": "Retrieve many products by ID",
+        "GET /products/name/<string:products_name>": "Retrieve a product by name",
+        "PUT /products/<id>": "Update a product by ID",
+        "DELETE /products/<id>": "Delete a product by ID",
+        "GET /products": "List all products",
+    },
+}
+SERVICE_INFO_JSON = dumps_bytes(SERVICE_INFO)
+
+
 @app.route("/")
 def index():
     """Root URL response"""
-    # Define the service information
-    service_info = {
-        "service_name": "Product API Service",
-        "version": "1.0.0",
-        "endpoints": {
-            "POST /products": "Create a new product",
-            "GET /products/<id>": "Retrieve a product by ID",
-            "GET /products/name/<string:products_name>": "Retrieve a product by name",
-            "PUT /products/<id>": "Update a product by ID",
-            "DELETE /products/<id>": "Delete a product by ID",
-            "GET /products": "List all products",
-        },
-    }
-
-    # Return the service information as JSON
-    return jsonify(service_info), status.HTTP_200_OK
+    # Return the pre-encoded service information as JSON
+    return Response(SERVICE_INFO_JSON, status.HTTP_200_OK, mimetype=JSON_CONTENT_TYPE)
 
 
 ######################################################################
@@ -66,7 +78,7 @@ def create_products():
     This endpoint will create a Products based the data in the body that is posted
     """
     app.logger.info("Request to Create a Product")
-    check_content_type("application/json")
+    check_content_type(JSON_CONTENT_TYPE)
 
     products = Products()
     products.deserialize(request.get_json())
@@ -74,7 +86,7 @@ def create_products():
     # Save the new Products to the database
     products.create()
     message = products.serialize()
-    location_url = url_for("get_products", products_id=products.id, _external=True)
+    location_url = f"{request.host_url[:-1]}{product_path()}{products.id}"
 
     app.logger.info("Products with new ID: %d created.", products.id)
 
@@ -82,22 +94,51 @@ def create_products():
     return jsonify(message), status.HTTP_201_CREATED, {"Location": location_url}
 
 
+######################################################################
+# CREATE MANY NEW PRODUCTS
+######################################################################
+@app.route("/products/bulk", methods=["POST"])
+def create_products_bulk():
+    """
+    Create many Products
+    This endpoint takes a list of Products and creates them all with a
+    single INSERT and one commit
+    """
+    app.logger.info("Request to Create Products in bulk")
+    check_content_type(JSON_CONTENT_TYPE)
+
+    data = request.get_json()
+    if not isinstance(data, list) or not data:
+        error(status.HTTP_400_BAD_REQUEST, "body must be a non-empty list of Products")
+
+    results = Products.bulk_create(data)
+
+    app.logger.info("Created %d Products in bulk", len(results))
+    return jsonify(results), status.HTTP_201_CREATED
+
+
+######################################################################
+# Builds the URL of a Product
+######################################################################
+@functools.cache
+def product_path() -> str:
+    """Returns the path of a Product minus its id, built once from the URL map"""
+    return url_for("get_products", products_id=0).removesuffix("0")
+
+
 ######################################################################
 # Checks the ContentType of a request
 ######################################################################
 def check_content_type(content_type) -> None:
     """Checks that the media type is correct"""
-    if "Content-Type" not in request.headers:
-        app.logger.error("No Content-Type specified.")
-        abort(
-            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            f"Content-Type must be {content_type}",
-        )
-
-    if request.headers["Content-Type"] == content_type:
+    request_type = request.headers.get("Content-Type")
+    if request_type == content_type:
         return
 
-    app.logger.error("Invalid Content-Type: %s", request.headers["Content-Type"])
+    if request_type is None:
+        app.logger.error("No Content-Type specified.")
+    else:
+        app.logger.error("Invalid Content-Type: %s", request_type)
     abort(
         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
         f"Content-Type must be {content_type}",
@@ -121,21 +162,65 @@ def error(status_code, reason):
 def get_products(products_id):
     """
     Retrieve a single Product
-    This endpoint will return a Product based on its ID
+    This endpoint will return a Product based on its ID, or 304 Not
+    Modified when the If-None-Match header already has its ETag
     """
-    app.logger.info(f"Request to retrieve Product with id: {products_id}")
+    app.logger.info("Request to retrieve Product with id: %s", products_id)
 
     # Find the product by its ID
     product = Products.find(products_id)
 
     # If product not found, abort with a 404 error
     if not product:
-        app.logger.error(f"Product with id: {products_id} not found.")
+        app.logger.error("Product with id: %s not found.", products_id)
         abort(status.HTTP_404_NOT_FOUND, f"Product with id {products_id} not found.")
 
-    app.logger.info(f"Returning product: {product.name}")
+    # Let clients that already hold this version skip the body
+    etag = product.etag()
+    if request.if_none_match.contains_weak(etag):
+        app.logger.info("Product with id: %s not modified.", products_id)
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        app.logger.info("Returning product: %s", product.name)
+        response = jsonify(product.serialize())
+    response.set_etag(etag, weak=True)
 
-    return jsonify(product.serialize()), status.HTTP_200_OK
+    return response
+
+
+######################################################################
+# RETRIEVE A BATCH OF PRODUCTS
+######################################################################
+@app.route("/products/batch", methods=["POST"])
+def get_products_batch():
+    """
+    Retrieve many Products by ID
+    This endpoint takes {"ids": [...]} and returns a map of id to Product
+    for every id that was found, fetched with a single query. Repeated ids
+    are only looked up once.
+    """
+    app.logger.info("Request to retrieve a batch of Products")
+    check_content_type(JSON_CONTENT_TYPE)
+
+    data = request.get_json()
+    ids = data.get("ids") if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(
+        isinstance(item, int) and not isinstance(item, bool) and item in INTEGER_RANGE
+        for item in ids
+    ):
+        error(status.HTTP_400_BAD_REQUEST, "ids must be a list of integers")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IDS:
+        error(
+            status.HTTP_400_BAD_REQUEST, f"ids must have at most {MAX_BATCH_IDS} items"
+        )
+
+    found = {row["id"]: row for row in Products.find_many_serialized(ids)}
+    # keep the order the ids were asked for
+    results = {item: found[item] for item in ids if item in found}
+
+    app.logger.info("Returning %d of %d product(s)", len(results), len(ids))
+    return jsonify(results), status.HTTP_200_OK
 
 
 ######################################################################
@@ -146,17 +231,17 @@ def update_products(products_id):
     """
     Update a Product
     """
-    app.logger.info(f"Request to update Product with id: {products_id}")
+    app.logger.info("Request to update Product with id: %s", products_id)
     product = Products.find(products_id)
     # If product not found, abort with a 404 error
     if not product:
-        app.logger.error(f"Product with id: {products_id} not found.")
+        app.logger.error("Product with id: %s not found.", products_id)
         abort(status.HTTP_404_NOT_FOUND, f"Product with id {products_id} not found.")
     # Deserialize the incoming data and update the fields
     product.deserialize(request.get_json())
     # Save the updated product to the database
     product.update()
-    app.logger.info(f"Product with id: {products_id} updated.")
+    app.logger.info("Product with id: %s updated.", products_id)
     return jsonify(product.serialize()), status.HTTP_200_OK
 
 
@@ -169,20 +254,19 @@ def get_products_by_name(products_name):
     Retrieve Products by name
     This endpoint will return a Product or Products base on name
     """
-    app.logger.info(f"Request to retrieve Products with name: {products_name}")
+    app.logger.info("Request to retrieve Products with name: %s", products_name)
 
-    # Find the product by its name
-    products = Products.find_by_name(products_name)
+    # Find the product rows by name
+    results = Products.find_by_name_serialized(products_name)
 
     # If products not found, abort with a 404 error
-    if not products:
-        app.logger.error(f"Product with name: {products_name} not found.")
+    if not results:
+        app.logger.error("Product with name: %s not found.", products_name)
         abort(
             status.HTTP_404_NOT_FOUND, f"Product with name {products_name} not found."
         )
 
-    app.logger.info(f"Returning {len(products)} product(s)")
-    results = [product.serialize() for product in products]
+    app.logger.info("Returning %d product(s)", len(results))
 
     return jsonify(results), status.HTTP_200_OK
 
@@ -196,14 +280,14 @@ def delete_products(products_id):
     Delete a single Product
     This endpoint will delete a Product based on its ID
     """
-    app.logger.info(f"Request to delete Product with id: {products_id}")
+    app.logger.info("Request to delete Product with id: %s", products_id)
 
     # Find the product by its ID
     product = Products.find(products_id)
 
     # If product not found, abort with a 404 error
     if not product:
-        app.logger.error(f"Product with id: {products_id} not found.")
+        app.logger.error("Product with id: %s not found.", products_id)
         abort(status.HTTP_404_NOT_FOUND, f"Product with id {products_id} not found.")
 
     product.delete()
@@ -218,12 +302,62 @@ def delete_products(products_id):
 ######################################################################
 @app.route("/products", methods=["GET"])
 def list_products():
-    """Returns all of the Products"""
+    """
+    Returns all of the Products
+    The list can be paged with ?limit=N&cursor=ID, where cursor is the id
+    of the last Product already seen, and trimmed to some of the columns
+    with ?fields=id,name,price. The JSON array is streamed a page of rows
+    at a time so the whole table is never held in memory.
+    """
     app.logger.info("Request for product list")
 
-    products = []
-    products = Products.all()
+    limit = get_int_arg("limit")
+    cursor = get_int_arg("cursor")
+    if limit is not None and limit < 1:
+        error(status.HTTP_400_BAD_REQUEST, "limit must be a positive integer")
+    fields = request.args.get("fields")
+    fields = tuple(dict.fromkeys(fields.split(","))) if fields else FIELDS
+
+    statement = Products.select_page(cursor=cursor, limit=limit, fields=fields)
+
+    # Run the query and fetch the first page before the response starts, so
+    # that database errors still go through the error handlers
+    pages = Products.serialized_pages(statement)
+    first = next(pages, [])
+
+    def generate():
+        # each page is dumped as one array and spliced into the stream
+        yield b"[" + dumps_bytes(first)[1:-1]
+        for page in pages:
+            yield b"," + dumps_bytes(page)[1:-1]
+        yield b"]"
+
+    app.logger.info("Streaming product list")
+    return Response(
+        stream_with_context(generate()),
+        status.HTTP_200_OK,
+        mimetype=JSON_CONTENT_TYPE,
+    )
 
-    results = [product.serialize() for product in products]
-    app.logger.info("Returning %d products", len(results))
-    return jsonify(results), status.HTTP_200_OK
+
+######################################################################
+# Reads an optional integer query parameter
+######################################################################
+def get_int_arg(name):
+    """Returns the named query parameter as an int, or None if absent
+
+    The value must fit in an Integer column, since it is compared with or
+    passed to the database as one
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        return error(
+            status.HTTP_400_BAD_REQUEST, f"{name} must be an integer, not {value}"
+        )
+    if number not in INTEGER_RANGE:
+        return error(status.HTTP_400_BAD_REQUEST, f"{name} is out of range: {value}")
+    return number
@@ -0,0 +1,49 @@
+"""
+Test Package
+
+When the suite runs in parallel under pytest-xdist (pytest -n auto) every
+worker gets its own copy of each Postgres test database, so workers never
+clear or truncate each other's rows. The copies are named with a _gw0,
+_gw1, ... suffix and are left in place for the next run
+"""
+
+import os
+import importlib
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from service import config
+
+
+def use_worker_database(variable: str, default: str = None) -> None:
+    """Points the database URI in an environment variable at this worker's copy
+
+    Args:
+        variable (str): the environment variable that holds the URI
+        default (str): the URI to use when the variable is not set
+    """
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    uri = os.getenv(variable, default)
+    if not worker or not uri:
+        return
+    url = make_url(uri)
+    if url.get_backend_name() != "postgresql":
+        return
+
+    name = f"{url.database}_{worker}"
+    engine = create_engine(url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as connection:
+        found = connection.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}
+        ).scalar()
+        if not found:
+            connection.exec_driver_sql(f'CREATE DATABASE "{name}"')
+    engine.dispose()
+    os.environ[variable] = url.set(database=name).render_as_string(hide_password=False)
+
+
+# This runs before any test module imports wsgi and creates the app engine.
+# The app falls back to the config default when DATABASE_URI is not set, so
+# that default gets a copy per worker too, and config is reloaded to see it
+use_worker_database("DATABASE_URI", config.DATABASE_URI)
+use_worker_database("ROUTES_DATABASE_URI")
+importlib.reload(config)
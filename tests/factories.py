@@ -3,9 +3,21 @@ Test Factory to make fake objects for testing
 """
 
 import factory
-from decimal import Decimal
+from factory.fuzzy import FuzzyChoice
+from faker import Faker
 from service.models import Products
 
+# Faker is slow per call, so build a pool of fake values once and have
+# the factory pick from it
+POOL_SIZE = 100
+fake = Faker()
+NAMES = [fake.name() for _ in range(POOL_SIZE)]
+DESCRIPTIONS = [fake.text() for _ in range(POOL_SIZE)]
+PRICES = [
+    fake.pydecimal(left_digits=2, right_digits=2, positive=True)
+    for _ in range(POOL_SIZE)
+]
+
 
 class ProductsFactory(factory.Factory):
     """Creates fake pets that you don't have to feed"""
@@ -16,8 +28,8 @@ class ProductsFactory(factory.Factory):
         model = Products
 
     id = factory.Sequence(lambda n: n)
-    name = factory.Faker("name")
-    description = factory.Faker("text")
-    price = factory.Faker("pydecimal", left_digits=2, right_digits=2, positive=True)
+    name = FuzzyChoice(NAMES)
+    description = FuzzyChoice(DESCRIPTIONS)
+    price = FuzzyChoice(PRICES)
 
     # Todo: Add your other attributes here...
@@ -0,0 +1,49 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Test cases for the orjson JSON Provider
+"""
+
+from decimal import Decimal
+from unittest import TestCase
+from wsgi import app
+from service.common.json_provider import OrjsonProvider
+
+
+class TestJSONProvider(TestCase):
+    """JSON Provider Tests"""
+
+    def test_app_uses_orjson(self):
+        """It should install the orjson provider on the app"""
+        self.assertIsInstance(app.json, OrjsonProvider)
+
+    def test_dumps_decimal(self):
+        """It should encode a Decimal as a string"""
+        self.assertEqual(app.json.dumps({"price": Decimal("9.99")}), '{"price":"9.99"}')
+
+    def test_dumps_int_keys(self):
+        """It should encode integer dictionary keys"""
+        self.assertEqual(app.json.dumps({1: "one"}), '{"1":"one"}')
+
+    def test_dumps_unsupported_type(self):
+        """It should raise a TypeError for types it cannot encode"""
+        self.assertRaises(TypeError, app.json.dumps, {"bad": object()})
+
+    def test_loads(self):
+        """It should decode JSON strings and bytes"""
+        self.assertEqual(app.json.loads('{"id": 1}'), {"id": 1})
+        self.assertEqual(app.json.loads(b"[1, 2]"), [1, 2])
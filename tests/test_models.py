@@ -56,7 +56,8 @@ class TestProducts(TestCase):
 
     def setUp(self):
         """This runs before each test"""
-        db.session.query(Products).delete()  # clean up the last tests
+        # clean up the last tests and restart the id sequence
+        db.session.execute(db.text("TRUNCATE products RESTART IDENTITY"))
         db.session.commit()
 
     def tearDown(self):
@@ -80,6 +81,38 @@ class TestProducts(TestCase):
         # Convert the price to Decimal and compare niv
         self.assertEqual(data.price, Decimal(products.price))
 
+    def test_bulk_create_products(self):
+        """It should create many Products in one commit"""
+        items = [products.serialize() for products in ProductsFactory.create_batch(3)]
+        created = Products.bulk_create(items)
+        self.assertEqual(len(created), 3)
+        self.assertEqual(len(Products.all()), 3)
+        for item, new in zip(items, created):
+            found = Products.find(new["id"])
+            self.assertEqual(found.name, item["name"])
+            self.assertEqual(found.price, item["price"])
+            self.assertEqual(found.serialize(), new)
+
+    def test_bulk_create_products_with_invalid_name(self):
+        """It should not create any Products when one of them is invalid"""
+        items = [products.serialize() for products in ProductsFactory.create_batch(2)]
+        items[1]["name"] = "x" * 100
+        with self.assertRaises(DataValidationError):
+            Products.bulk_create(items)
+        self.assertEqual(len(Products.all()), 0)
+
+    def test_bulk_create_products_rolls_back(self):
+        """It should roll back a bulk create when the commit fails"""
+        items = [products.serialize() for products in ProductsFactory.create_batch(2)]
+        with patch(
+            "service.models.db.session.commit",
+            side_effect=Exception("Mock commit exception during bulk create"),
+        ):
+            with self.assertRaises(DataValidationError) as context:
+                Products.bulk_create(items)
+        self.assertIn("Mock commit exception", str(context.exception))
+        self.assertEqual(len(Products.all()), 0)
+
     def test_create_products_with_invalid_name(self):
         """It should raise DataValidationError when the name exceeds the maximum length"""
         products = ProductsFactory()
@@ -146,3 +179,81 @@ class TestProducts(TestCase):
             "Invalid Products: body of request contained bad or no data",
             str(context.exception),
         )
+
+    def test_serialize_rows(self):
+        """It should list all Products as serialized rows"""
+        for products in ProductsFactory.create_batch(3):
+            products.create()
+        rows = Products.serialize_rows(Products.select_page())
+        self.assertEqual(len(rows), 3)
+        for row in rows:
+            self.assertEqual(row, Products.find(row["id"]).serialize())
+
+    def test_serialized_pages(self):
+        """It should stream Products rows a page at a time"""
+        for products in ProductsFactory.create_batch(5):
+            products.create()
+        pages = list(Products.serialized_pages(Products.select_page(), size=2))
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        ids = [row["id"] for page in pages for row in page]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_select_page(self):
+        """It should select a page of Products after a cursor"""
+        for products in ProductsFactory.create_batch(5):
+            products.create()
+        ids = [row["id"] for row in Products.serialize_rows(Products.select_page())]
+        rows = Products.serialize_rows(Products.select_page(cursor=ids[1], limit=2))
+        self.assertEqual([row["id"] for row in rows], ids[2:4])
+
+    def test_find_by_name_serialized(self):
+        """It should find Products rows by name"""
+        products = ProductsFactory.create_batch(3)
+        for item in products:
+            item.create()
+        name = products[0].name
+        count = len([item for item in products if item.name == name])
+        rows = Products.find_by_name_serialized(name)
+        self.assertEqual(len(rows), count)
+        self.assertEqual(len(Products.find_by_name(name)), count)
+        for row in rows:
+            self.assertEqual(row["name"], name)
+
+    def test_serialize_keeps_decimal_price(self):
+        """It should serialize the price as a Decimal"""
+        products = ProductsFactory(price=Decimal("12.50"))
+        self.assertEqual(products.serialize()["price"], Decimal("12.50"))
+
+    def test_deserialize_numeric_price(self):
+        """It should deserialize prices given as strings and numbers"""
+        data = {"name": "shoes", "description": "leather"}
+        for price in ("9.99", 9.99, 9, Decimal("9.99")):
+            products = Products().deserialize({**data, "price": price})
+            self.assertIsInstance(products.price, Decimal)
+            self.assertEqual(products.price, Decimal(str(price)))
+
+    def test_deserialize_bad_price(self):
+        """It should not deserialize a price that is not a number"""
+        data = {"name": "shoes", "description": "leather"}
+        for price in ("cheap", True, None, [1]):
+            self.assertRaises(
+                DataValidationError, Products().deserialize, {**data, "price": price}
+            )
+
+    def test_deserialize_too_long(self):
+        """It should not deserialize a name or description that will not fit"""
+        data = {"name": "shoes", "description": "leather", "price": "9.99"}
+        for field, length in (("name", 64), ("description", 257)):
+            with self.assertRaises(DataValidationError) as context:
+                Products().deserialize({**data, field: "x" * length})
+            self.assertIn(f"{field} is longer than", str(context.exception))
+
+    def test_deserialize_bad_precision(self):
+        """It should not deserialize a price that does not fit Numeric(10, 2)"""
+        data = {"name": "shoes", "description": "leather"}
+        for price in ("9.999", "100000000", "-100000000.00", "NaN", "Infinity"):
+            with self.assertRaises(DataValidationError) as context:
+                Products().deserialize({**data, "price": price})
+            self.assertIn("price must have at most 8 digits", str(context.exception))
+        products = Products().deserialize({**data, "price": "99999999.990"})
+        self.assertEqual(products.price, Decimal("99999999.99"))